@@ -8,32 +8,81 @@ import os
 import json
 import sys
 import re
+import heapq
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from collections import Counter, defaultdict
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from collections import Counter, OrderedDict, defaultdict
 import fitz  # PyMuPDF
 import logging
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+try:
+    import orjson  # Optional C JSON encoder
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Pre-compiled patterns shared by the per-line checks
+_HEADING_PATTERNS = (
+    r'^\d+\.?\s+[A-Z]',  # "1. Introduction"
+    r'^\d+\.\d+\.?\s+',  # "1.1 Background"
+    r'^(Chapter|Section|Part)\s+\d+',  # "Chapter 1"
+    r'^[A-Z][A-Z\s]{2,}$',  # All caps headings
+    r'^[A-Z][a-z]+(\s+[A-Z][a-z]*)*$',  # Title case
+    r'^(Abstract|Introduction|Conclusion|References|Bibliography|Acknowledgments?)$'  # Common section names
+)
+# All heading patterns unioned so each line is matched once
+_HEADING_UNION = re.compile('(?:' + '|'.join(f'(?:{p})' for p in _HEADING_PATTERNS) + ')', re.IGNORECASE)
+# Numbered headings: group 1 set for "1.1.1", group 2 for "1.1", neither for "1"
+_NUM_LEVEL = re.compile(r'^\d+(?:(\.\d+\.\d+)|(\.\d+))?\.?\s+')
+_BULLET = re.compile(r"^\s*[\u2022\-\*•]\s+\S+")  # bullets like • - * etc
+_NUMLIST = re.compile(r"^\s*\(?\d+[\.\)]\s+\S+")  # numbered list
+# Text dict extraction without image blocks, whose embedded image bytes nothing here reads
+_PAGE_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+# Metadata labels that are not headings outside the first page
+_METADATA_WORDS = frozenset({"overview", "version", "date", "remarks", "identifier", "reference"})
+# Common non-title text
+_TITLE_SKIP_RE = re.compile(r'copyright|version|page|©|confidential|draft|revision|date|author', re.IGNORECASE)
+# Whitespace runs, collapsed to a single space
+_WS = re.compile(r'\s+')
+# Control characters and lone surrogates (which can't be written as UTF-8) to delete.
+# \x0B, \x0C and \x1C-\x1F are left for _WS, which treats them as whitespace.
+_CLEAN_TABLE = dict.fromkeys([*range(0x00, 0x09), *range(0x0E, 0x1C), 0x7F, *range(0xD800, 0xE000)])
+
+
+def _line_top(line: Dict) -> float:
+    """Top of a line's first non-blank span, the position headings and content are compared by"""
+    for span in line["spans"]:
+        if span["text"].strip():
+            return span.get("bbox", [0, 0, 0, 0])[1]
+    return line["bbox"][1]
+
 
 class EnhancedPDFOutlineExtractor:
     """Enhanced PDF outline extractor with sophisticated content detection"""
     
     def __init__(self):
         self.doc = None
-        self.font_sizes = []
         self.common_font_size = None
         self.extracted_title = ""
         self.min_font_size_threshold = 8
         self.title_search_pages = 3
+        self.page_cache_size = 64
+        self._page_dicts: "OrderedDict[int, Dict]" = OrderedDict()
+        self._first_page_lines: Optional[List[Dict[str, Any]]] = None
+        self._page_lines: List[List[Tuple[float, str]]] = []
         
     def process_pdf(self, pdf_path: str) -> Dict[str, Any]:
         """Main method to process a PDF and extract outline"""
         logger.info(f"Processing PDF: {pdf_path}")
         
+        self._reset_state()
+        
         try:
             self.doc = fitz.open(pdf_path)
             logger.info(f"Document has {len(self.doc)} pages")
@@ -59,28 +108,62 @@ class EnhancedPDFOutlineExtractor:
         finally:
             if self.doc:
                 self.doc.close()
+            self._reset_state()
+            # Release MuPDF's glyph/image store so memory stays flat across a batch
+            fitz.TOOLS.store_shrink(100)
+    
+    def _reset_state(self) -> None:
+        """Clear per-document state so the extractor can be reused for the next PDF"""
+        self.doc = None
+        self.common_font_size = None
+        self.extracted_title = ""
+        self._page_dicts.clear()
+        self._first_page_lines = None
+        self._page_lines = []
+    
+    def _get_page_dict(self, page_num: int) -> Dict:
+        """Return the parsed text dict for a page, cached across passes"""
+        page_dict = self._page_dicts.get(page_num)
+        if page_dict is None:
+            page_dict = self.doc[page_num].get_text("dict", flags=_PAGE_DICT_FLAGS)
+            self._page_dicts[page_num] = page_dict
+            # Bound the cache so very large PDFs don't grow memory unchecked
+            if len(self._page_dicts) > self.page_cache_size:
+                self._page_dicts.popitem(last=False)
+        else:
+            self._page_dicts.move_to_end(page_num)
+        return page_dict
     
     def _analyze_document_fonts(self) -> None:
         """Analyze font sizes across the document to establish baseline"""
-        font_sizes = []
+        font_sizes = Counter()
+        total = 0
         
-        # Analyze first few pages for font patterns
-        for page_num in range(min(3, len(self.doc))):
-            page = self.doc[page_num]
-            blocks = page.get_text("dict")
+        # Analyze first few pages for font patterns, stopping once the mode is clear
+        for size in self._iter_span_sizes(min(3, len(self.doc))):
+            font_sizes[size] += 1
+            total += 1
             
-            for block in blocks.get("blocks", []):
-                if "lines" in block:
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            text = span["text"].strip()
-                            if text:
-                                font_sizes.append(span["size"])
-        
-        self.font_sizes = font_sizes
-        self.common_font_size = Counter(font_sizes).most_common(1)[0][0] if font_sizes else 12
+            # Check every 100 spans: enough samples, or one size is the clear majority
+            if total % 100 == 0:
+                if total >= 2000:
+                    break
+                if total >= 300 and font_sizes.most_common(1)[0][1] * 2 > total:
+                    break
+        
+        self.common_font_size = font_sizes.most_common(1)[0][0] if font_sizes else 12
         logger.info(f"Common font size detected: {self.common_font_size}")
     
+    def _iter_span_sizes(self, page_count: int) -> Iterator[float]:
+        """Yield the font size of every non-blank span on the first pages"""
+        for page_num in range(page_count):
+            for block in self._get_page_dict(page_num).get("blocks", []):
+                for line in block.get("lines", ()):
+                    for span in line["spans"]:
+                        text = span["text"]
+                        if text and not text.isspace():
+                            yield span["size"]
+    
     def _extract_title_enhanced(self) -> str:
         """Enhanced title extraction using multiple strategies"""
         # Strategy 1: Try to get title from document outline/bookmarks
@@ -104,58 +187,32 @@ class EnhancedPDFOutlineExtractor:
             return "Unknown Title"
         
         # Look only at first page for title
-        page = self.doc[0]
-        blocks = page.get_text("dict")
-        candidates = []
-        
-        for block in blocks.get("blocks", []):
-            if "lines" in block:
-                for line in block["lines"]:
-                    line_text = ""
-                    max_size = 0
-                    y_pos = float('inf')
-                    flags = 0
-                    
-                    for span in line["spans"]:
-                        text = span["text"].strip()
-                        if text:
-                            line_text += text + " "
-                            max_size = max(max_size, span["size"])
-                            y_pos = min(y_pos, span.get("bbox", [0, 0, 0, 0])[1])
-                            flags |= span["flags"]
-                    
-                    line_text = line_text.strip()
-                    
-                    if self._is_potential_title(line_text, max_size, flags):
-                        candidates.append({
-                            'text': line_text,
-                            'size': max_size,
-                            'y_pos': y_pos
-                        })
+        candidates = [line_data for line_data in self._analyze_page_lines(0)
+                      if self._is_potential_title(line_data)]
         
         if candidates:
-            # Sort by font size (descending), then by position
-            candidates.sort(key=lambda x: (-x['size'], x['y_pos']))
+            # Take the two largest by font size (descending), then by position
+            top = heapq.nsmallest(2, candidates, key=lambda x: (-x['size'], x['y_pos']))
             
             # Combine top candidates if they're close in size/position
-            combined = "  ".join(c['text'] for c in candidates[:2])
+            combined = "  ".join(c['text'] for c in top)
             return self._clean_text(combined)
         
         return "Unknown Title"
     
-    def _is_potential_title(self, text: str, size: float, flags: int) -> bool:
-        """Check if text could be a title"""
+    def _is_potential_title(self, line_data: Dict[str, Any]) -> bool:
+        """Check if an analyzed line could be a title"""
+        text = line_data['text']
         if not text or len(text) < 3 or len(text) > 150:
             return False
         
         # Skip common non-title text
-        skip_words = ['copyright', 'version', 'page', '©', 'confidential', 'draft', 'revision', 'date', 'author']
-        if any(skip.lower() in text.lower() for skip in skip_words):
+        if _TITLE_SKIP_RE.search(text):
             return False
         
         # Check formatting indicators
-        is_bold = flags & (1 << 4)  # Bold flag
-        is_large = size > self.common_font_size * 1.2
+        is_bold = line_data['flags'] & (1 << 4)  # Bold flag
+        is_large = line_data['size'] > self.common_font_size * 1.2
         
         return is_large or is_bold
     
@@ -165,22 +222,27 @@ class EnhancedPDFOutlineExtractor:
     
     def _extract_headings_from_text(self) -> List[Dict[str, Any]]:
         """Extract headings by analyzing text formatting and content"""
+        headings = self._collect_headings()
+        
+        # Filter headings that have meaningful content after them
+        return self._filter_headings_with_subtext(headings)
+    
+    def _collect_headings(self) -> List[Dict[str, Any]]:
+        """Collect heading candidates from every page, recording each page's lines for the content sweep"""
         headings = []
         thresholds = self._calculate_size_thresholds()
         
+        analyze_page_lines = self._analyze_page_lines
+        extract_page_headings = self._extract_page_headings
+        page_lines = self._page_lines = []
         for page_num in range(len(self.doc)):
-            page = self.doc[page_num]
-            blocks = page.get_text("dict")
-            page_headings = self._extract_page_headings(blocks, page_num, thresholds)
-            headings.extend(page_headings)
+            lines = analyze_page_lines(page_num)
+            # Only (y, text) is kept, so the sweep doesn't extract the page again
+            page_lines.append([(line_data['y_pos'], line_data['text']) for line_data in lines])
+            headings.extend(extract_page_headings(lines, page_num, thresholds))
         
         # Post-process headings
-        headings = self._post_process_headings(headings)
-        
-        # Filter headings that have meaningful content after them
-        headings = self._filter_headings_with_subtext(headings)
-        
-        return headings
+        return self._post_process_headings(headings)
     
     def _calculate_size_thresholds(self) -> Dict[str, float]:
         """Calculate font size thresholds for different heading levels"""
@@ -191,82 +253,96 @@ class EnhancedPDFOutlineExtractor:
             "h3": baseline * 1.1
         }
     
-    def _extract_page_headings(self, blocks: Dict, page_num: int, thresholds: Dict[str, float]) -> List[Dict[str, Any]]:
-        """Extract headings from a single page"""
+    def _extract_page_headings(self, lines: List[Dict[str, Any]], page_num: int, thresholds: Dict[str, float]) -> List[Dict[str, Any]]:
+        """Extract headings from the analyzed lines of a single page"""
         headings = []
         prev = None
         
-        for block in blocks.get("blocks", []):
-            if "lines" not in block:
+        # Bind hot lookups once for the per-line loop
+        heading_candidate_confidence = self._heading_candidate_confidence
+        determine_heading_level = self._determine_heading_level
+        clean_text = self._clean_text
+        title = self.extracted_title
+        skip_metadata = page_num != 0
+        
+        for line_data in lines:
+            text = line_data['text_lower']
+            
+            # Skip common metadata on non-first pages
+            if skip_metadata and text in _METADATA_WORDS:
                 continue
-                
-            for line in block["lines"]:
-                line_data = self._analyze_line(line)
-                if not line_data:
-                    continue
-                
-                text = line_data['text'].lower().strip()
-                
-                # Skip common metadata on non-first pages
-                if text in {"overview", "version", "date", "remarks", "identifier", "reference"} and page_num != 0:
+            
+            # Skip title
+            if text == title:
+                continue
+            
+            confidence = heading_candidate_confidence(line_data, thresholds)
+            if confidence is not None:
+                # Special case: combine with previous if it's "syllabus"
+                if prev and text == 'syllabus':
+                    prev['text'] += " " + line_data['text']
                     continue
                 
-                # Skip title
-                if text == self.extracted_title:
-                    continue
+                level = determine_heading_level(line_data, thresholds)
                 
-                if self._is_heading_candidate(line_data, thresholds):
-                    # Special case: combine with previous if it's "syllabus"
-                    if prev and line_data['text'].lower().strip() == 'syllabus':
-                        prev['text'] += " " + line_data['text']
-                        continue
-                    
-                    level = self._determine_heading_level(line_data, thresholds)
-                    
-                    heading = {
-                        "level": level,
-                        "text": self._clean_text(line_data['text']),
-                        "page": page_num,  # 0-based for internal processing
-                        "confidence": line_data.get('confidence', 0.5),
-                        "bbox": line_data.get('bbox')
-                    }
-                    headings.append(heading)
-                    prev = heading
+                heading = {
+                    "level": level,
+                    "level_int": int(level[1]),
+                    "text": clean_text(line_data['text']),
+                    "page": page_num,  # 0-based for internal processing
+                    "confidence": confidence,
+                    "y": line_data['y_pos']
+                }
+                headings.append(heading)
+                prev = heading
         
         return headings
     
+    def _analyze_page_lines(self, page_num: int) -> List[Dict[str, Any]]:
+        """Analyze every text line on a page (page 0 is kept for title and heading extraction)"""
+        if page_num == 0 and self._first_page_lines is not None:
+            return self._first_page_lines
+        
+        lines = []
+        analyze_line = self._analyze_line
+        for block in self._get_page_dict(page_num).get("blocks", []):
+            for line in block.get("lines", ()):
+                line_data = analyze_line(line)
+                if line_data:
+                    lines.append(line_data)
+        
+        if page_num == 0:
+            self._first_page_lines = lines
+        return lines
+    
     def _analyze_line(self, line: Dict) -> Optional[Dict[str, Any]]:
         """Analyze a line of text for heading characteristics"""
-        line_text = ""
+        parts = []
         max_size = 0
         flags = 0
-        bbox = None
         
         for span in line["spans"]:
             text = span["text"].strip()
             if text:
-                line_text += text + " "
-                max_size = max(max_size, span["size"])
+                parts.append(text)
+                if span["size"] > max_size:
+                    max_size = span["size"]
                 flags |= span["flags"]
-                if bbox is None:
-                    bbox = span.get("bbox", [0, 0, 0, 0])
         
-        line_text = line_text.strip()
+        line_text = " ".join(parts)
         
         if not line_text or len(line_text) < 2:
             return None
         
-        confidence = self._calculate_confidence(line_text, max_size, flags)
-        
         return {
             'text': line_text,
+            'text_lower': line_text.lower(),
             'size': max_size,
             'flags': flags,
-            'bbox': bbox,
-            'confidence': confidence
+            'y_pos': _line_top(line)
         }
     
-    def _calculate_confidence(self, text: str, size: float, flags: int) -> float:
+    def _calculate_confidence(self, text: str, size: float, flags: int, matches_pattern: bool) -> float:
         """Calculate confidence score for heading detection"""
         confidence = 0.0
         
@@ -281,7 +357,7 @@ class EnhancedPDFOutlineExtractor:
             confidence += 0.2
         
         # Pattern matching
-        if self._matches_heading_patterns(text):
+        if matches_pattern:
             confidence += 0.3
         
         # Length-based confidence
@@ -292,32 +368,25 @@ class EnhancedPDFOutlineExtractor:
     
     def _matches_heading_patterns(self, text: str) -> bool:
         """Check if text matches common heading patterns"""
-        patterns = [
-            r'^\d+\.?\s+[A-Z]',  # "1. Introduction"
-            r'^\d+\.\d+\.?\s+',  # "1.1 Background"
-            r'^(Chapter|Section|Part)\s+\d+',  # "Chapter 1"
-            r'^[A-Z][A-Z\s]{2,}$',  # All caps headings
-            r'^[A-Z][a-z]+(\s+[A-Z][a-z]*)*$',  # Title case
-            r'^(Abstract|Introduction|Conclusion|References|Bibliography|Acknowledgments?)$'  # Common section names
-        ]
-        
-        return any(re.match(pattern, text.strip(), re.IGNORECASE) for pattern in patterns)
-    
-    def _is_heading_candidate(self, line_data: Dict, thresholds: Dict[str, float]) -> bool:
-        """Check if a line is a potential heading"""
+        return _HEADING_UNION.match(text.strip()) is not None
+    
+    def _heading_candidate_confidence(self, line_data: Dict, thresholds: Dict[str, float]) -> Optional[float]:
+        """Return the heading confidence of a line, or None if it is not a potential heading"""
         text = line_data['text']
         size = line_data['size']
         
         # Basic filters
         if len(text) > 200 or len(text) < 3:
-            return False
+            return None
         
         # Must meet size threshold OR pattern matching, with minimum confidence
-        meets_size = size >= thresholds['h3']
         meets_pattern = self._matches_heading_patterns(text)
-        meets_confidence = line_data['confidence'] > 0.4
+        if size < thresholds['h3'] and not meets_pattern:
+            return None
         
-        return (meets_size or meets_pattern) and meets_confidence
+        # Scored only for lines that pass the cheap checks
+        confidence = self._calculate_confidence(text, size, line_data['flags'], meets_pattern)
+        return confidence if confidence > 0.4 else None
     
     def _determine_heading_level(self, line_data: Dict, thresholds: Dict[str, float]) -> str:
         """Determine the heading level (H1, H2, H3)"""
@@ -325,12 +394,11 @@ class EnhancedPDFOutlineExtractor:
         size = line_data['size']
         
         # Pattern-based level detection
-        if re.match(r'^\d+\.?\s+', text.strip()):
-            return "H1"
-        elif re.match(r'^\d+\.\d+\.?\s+', text.strip()):
-            return "H2"
-        elif re.match(r'^\d+\.\d+\.\d+\.?\s+', text.strip()):
-            return "H3"
+        numbered = _NUM_LEVEL.match(text.strip())
+        if numbered:
+            if numbered.group(1):
+                return "H3"
+            return "H2" if numbered.group(2) else "H1"
         
         # Size-based level detection
         if size >= thresholds['h1']:
@@ -340,68 +408,92 @@ class EnhancedPDFOutlineExtractor:
         else:
             return "H3"
     
-    def _has_content_after_heading(self, heading: Dict[str, Any], next_heading: Optional[Dict[str, Any]]) -> bool:
-        """Check if there's meaningful content after a heading"""
-        start_page = heading['page']
-        end_page = next_heading['page'] if next_heading else min(start_page + 1, len(self.doc) - 1)
+    def _find_headings_with_children(self, headings: List[Dict[str, Any]]) -> List[bool]:
+        """Flag headings followed by a deeper heading on the same or next page"""
+        has_children = [False] * len(headings)
+        # Page of the nearest later heading at each level, filled in reverse
+        nearest_page: Dict[int, int] = {}
+        
+        for i in range(len(headings) - 1, -1, -1):
+            heading = headings[i]
+            level = heading['level_int']
+            has_children[i] = any(page <= heading['page'] + 1
+                                  for child_level, page in nearest_page.items()
+                                  if child_level > level)
+            nearest_page[level] = heading['page']
+        
+        return has_children
+    
+    def _find_headings_with_content(self, headings: List[Dict[str, Any]],
+                                    resolved: Optional[List[bool]] = None) -> List[bool]:
+        """Flag headings followed by meaningful content, in a single pass over the pages
         
-        for page_num in range(start_page, end_page + 1):
-            page = self.doc[page_num]
-            blocks = page.get_text("dict").get("blocks", [])
+        Headings already flagged in ``resolved`` stay flagged and are not scanned for content.
+        """
+        has_content = list(resolved) if resolved is not None else [False] * len(headings)
+        if not headings:
+            return has_content
+        
+        # Document-order positions of the headings, used to attribute each line to its owner
+        positions = [(h['page'], h['y']) for h in headings]
+        heading_texts = [h['text'].lower() for h in headings]
+        # Content for the last heading is only searched up to the following page
+        last_page = min(headings[-1]['page'] + 1, len(self.doc) - 1)
+        
+        page_lines = self._page_lines
+        image_tops = self._image_tops
+        matches_heading_patterns = self._matches_heading_patterns
+        for page_num in range(headings[0]['page'], last_page + 1):
+            # Skip the page entirely once every heading whose section overlaps it has content
+            first = max(bisect_left(positions, (page_num,)) - 1, 0)
+            last = bisect_right(positions, (page_num, float('inf')))
+            if all(has_content[first:last]):
+                continue
             
-            for block in blocks:
-                if "lines" in block:
-                    for line in block["lines"]:
-                        line_text = " ".join(span["text"].strip() for span in line["spans"] if span["text"].strip())
-                        if not line_text:
-                            continue
-                        
-                        # Skip if it's the heading itself
-                        if heading["text"].lower() in line_text.lower():
-                            continue
-                        
-                        # Skip if it's another heading
-                        if self._matches_heading_patterns(line_text):
-                            continue
-                        
-                        # Check for paragraph text (long sentences)
-                        if len(line_text) > 40 and not line_text.isupper():
-                            return True
-                        
-                        # Check for bullet/numbered lists
-                        if re.match(r"^\s*[\u2022\-\*•]\s+\S+", line_text):  # bullets like • - * etc
-                            return True
-                        if re.match(r"^\s*\(?\d+[\.\)]\s+\S+", line_text):  # numbered list
-                            return True
+            for y, line_text in page_lines[page_num]:
+                owner = bisect_right(positions, (page_num, y)) - 1
+                if owner < 0 or has_content[owner]:
+                    continue
                 
-                elif block.get("type") == 1:  # Image/table/figure
-                    return True
-        
-        return False
+                # Skip if it's the heading itself
+                if heading_texts[owner] in line_text.lower():
+                    continue
+                
+                # Skip if it's another heading
+                if matches_heading_patterns(line_text):
+                    continue
+                
+                # Paragraph text (long sentences) or bullet/numbered lists
+                if ((len(line_text) > 40 and not line_text.isupper()) or
+                        _BULLET.match(line_text) or _NUMLIST.match(line_text)):
+                    has_content[owner] = True
+            
+            # Images/tables/figures, only looked up if the text left a heading unresolved
+            if not all(has_content[first:last]):
+                for y in image_tops(page_num):
+                    owner = bisect_right(positions, (page_num, y)) - 1
+                    if owner >= 0:
+                        has_content[owner] = True
+        
+        return has_content
+    
+    def _image_tops(self, page_num: int) -> List[float]:
+        """Return the top y of each image drawn on a page, inline images included"""
+        # Page dicts are extracted without image blocks, so images are looked up separately
+        return [image["bbox"][1] for image in self.doc[page_num].get_image_info()]
     
     def _filter_headings_with_subtext(self, headings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter headings to keep only those with meaningful content or subheadings"""
         result = []
+        has_children = self._find_headings_with_children(headings)
+        # Headings with children are kept anyway, so only the rest need a content scan
+        keep = self._find_headings_with_content(headings, resolved=has_children)
         
         for i, heading in enumerate(headings):
-            next_heading = headings[i + 1] if i + 1 < len(headings) else None
-            
-            # Check if this heading has subheadings (children)
-            has_children = False
-            for j in range(i + 1, len(headings)):
-                if headings[j]['page'] > heading['page'] + 1:
-                    break
-                if int(headings[j]['level'][1]) > int(heading['level'][1]):
-                    has_children = True
-                    break
-            
-            # Check if this heading has meaningful content after it
-            has_content = self._has_content_after_heading(heading, next_heading)
-            
             # Keep heading if it has children or content
-            if has_children or has_content:
+            if keep[i]:
                 # Clean up the heading before adding to result
-                clean_heading = {k: v for k, v in heading.items() if k not in ['confidence', 'bbox']}
+                clean_heading = {k: v for k, v in heading.items() if k not in ['confidence', 'y', 'level_int']}
                 # Convert to 1-based page numbering for output
                 clean_heading['page'] = clean_heading['page'] + 1
                 result.append(clean_heading)
@@ -424,22 +516,61 @@ class EnhancedPDFOutlineExtractor:
                 unique_headings.append(heading)
         
         # Sort by page and position
-        unique_headings.sort(key=lambda x: (x['page'], x.get('bbox', [0])[1] if x.get('bbox') else 0))
+        unique_headings.sort(key=lambda x: (x['page'], x['y']))
         
         return unique_headings
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text"""
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        # Remove control characters
-        text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
-        
-        # Ensure proper encoding
-        text = text.encode('utf-8', 'ignore').decode('utf-8')
+        # Remove control characters and unencodable surrogates
+        text = text.translate(_CLEAN_TABLE)
         
-        return text
+        # Remove extra whitespace
+        return _WS.sub(' ', text.strip())
+
+
+# Extractor reused by every file handled in a worker process
+_worker_extractor: Optional[EnhancedPDFOutlineExtractor] = None
+# Upper bound on worker processes; each holds its own PyMuPDF state and page cache
+MAX_WORKERS = 4
+
+
+def _init_worker() -> None:
+    """Create the worker process's extractor"""
+    global _worker_extractor
+    _worker_extractor = EnhancedPDFOutlineExtractor()
+
+
+def _write_json(output_file: Path, data: Dict[str, Any]) -> None:
+    """Write data as indented UTF-8 JSON, using orjson when it is installed"""
+    if orjson is not None:
+        output_file.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _process_one(pdf_path: str, output_dir: str) -> None:
+    """Process a single PDF and save its JSON output (runs in a worker process)"""
+    pdf_file = Path(pdf_path)
+    
+    try:
+        # Process PDF, building an extractor when called outside the worker pool
+        extractor = _worker_extractor or EnhancedPDFOutlineExtractor()
+        result = extractor.process_pdf(pdf_path)
+        
+        # Save JSON output
+        output_file = Path(output_dir) / f"{pdf_file.stem}.json"
+        _write_json(output_file, result)
+        
+        logger.info(f"Successfully processed {pdf_file.name}")
+        logger.info(f"Title: {result['title']}")
+        logger.info(f"Found {len(result['outline'])} headings")
+        logger.info(f"Output saved to: {output_file.name}")
+        print("-" * 50)  # Visual separator
+        
+    except Exception as e:
+        logger.error(f"Error processing {pdf_file.name}: {e}")
 
 
 def process_all_pdfs(input_dir: str, output_dir: str):
@@ -450,8 +581,6 @@ def process_all_pdfs(input_dir: str, output_dir: str):
     # Create output directory if it doesn't exist
     output_path.mkdir(parents=True, exist_ok=True)
     
-    extractor = EnhancedPDFOutlineExtractor()
-    
     # Find all PDF files
     pdf_files = list(input_path.glob("*.pdf"))
     
@@ -461,24 +590,14 @@ def process_all_pdfs(input_dir: str, output_dir: str):
     
     logger.info(f"Found {len(pdf_files)} PDF files to process")
     
-    for pdf_file in pdf_files:
-        try:
-            # Process PDF
-            result = extractor.process_pdf(str(pdf_file))
-            
-            # Save JSON output
-            output_file = output_path / f"{pdf_file.stem}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f"Successfully processed {pdf_file.name}")
-            logger.info(f"Title: {result['title']}")
-            logger.info(f"Found {len(result['outline'])} headings")
-            logger.info(f"Output saved to: {output_file.name}")
-            print("-" * 50)  # Visual separator
-            
-        except Exception as e:
-            logger.error(f"Error processing {pdf_file.name}: {e}")
+    # Files are independent, so spread them across the CPUs this process may run on
+    if hasattr(os, "sched_getaffinity"):
+        available_cpus = len(os.sched_getaffinity(0))
+    else:
+        available_cpus = os.cpu_count() or 1
+    max_workers = min(len(pdf_files), available_cpus, MAX_WORKERS)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        list(executor.map(partial(_process_one, output_dir=str(output_path)), [str(p) for p in pdf_files]))
 
 
 def main():
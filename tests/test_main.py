@@ -0,0 +1,170 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from main import EnhancedPDFOutlineExtractor, _process_one, process_all_pdfs  # noqa: E402
+
+BODY = "This is a body paragraph line with plenty of words to exceed forty chars."
+
+
+def _outline_texts(pdf_path):
+    result = EnhancedPDFOutlineExtractor().process_pdf(str(pdf_path))
+    return [heading["text"] for heading in result["outline"]]
+
+
+def _make_doc(pages):
+    """Build a PDF with one list of (text, fontsize) lines per page; large lines are bold"""
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        y = 60
+        for text, size in lines:
+            page.insert_text((50, y), text, fontsize=size, fontname="hebo" if size >= 18 else "helv")
+            y += size + 10
+    return doc
+
+
+def _content_sweep(pages):
+    """Run heading collection and the content sweep with a fixed 10pt body size"""
+    extractor = EnhancedPDFOutlineExtractor()
+    extractor.doc = _make_doc(pages)
+    extractor.common_font_size = 10
+    headings = extractor._collect_headings()
+    return [heading["text"] for heading in headings], extractor._find_headings_with_content(headings)
+
+
+def _levels(*headings):
+    return [{"page": page, "level_int": level} for page, level in headings]
+
+
+def test_heading_line_with_small_leading_span_is_not_content_of_previous_heading(tmp_path):
+    # The "*" span sits higher than the heading text it shares a line with, so the
+    # line's own bbox starts above the heading's stored position
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 60), "1. Alpha", fontsize=18, fontname="hebo")
+    page.insert_text((50, 100), "*", fontsize=8)
+    page.insert_text((60, 100), "Results and discussion, for the year in review", fontsize=18, fontname="hebo")
+    for i in range(8):
+        page.insert_text((50, 130 + 14 * i), BODY, fontsize=10)
+    pdf_path = tmp_path / "star.pdf"
+    doc.save(pdf_path)
+    
+    assert "1. Alpha" not in _outline_texts(pdf_path)
+
+
+def test_content_sweep_does_not_depend_on_page_cache():
+    # Tightly spaced body lines and a large heading end up in the same text block
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 60), "1. Intro", fontsize=30, fontname="hebo")
+    writer = fitz.TextWriter(page.rect)
+    y = 100
+    for _ in range(6):
+        writer.append((50, y), BODY, fontsize=11)
+        y += 12
+    y += 24
+    writer.append((50, y), "2. Methods", fontsize=30)
+    y += 34
+    writer.append((50, y), "3. Results", fontsize=30)
+    y += 34
+    for _ in range(3):
+        writer.append((50, y), BODY, fontsize=11)
+        y += 12
+    writer.write_text(page)
+    
+    extractor = EnhancedPDFOutlineExtractor()
+    extractor.doc = doc
+    extractor._analyze_document_fonts()
+    headings = extractor._collect_headings()
+    assert [heading["text"] for heading in headings] == ["1. Intro", "2. Methods", "3. Results"]
+    
+    cached = extractor._find_headings_with_content(headings)
+    extractor._page_dicts.clear()
+    evicted = extractor._find_headings_with_content(headings)
+    
+    assert cached == evicted == [True, False, True]
+
+
+def test_inline_image_counts_as_content(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 60), "1. Figure Heading", fontsize=18, fontname="hebo")
+    page.insert_text((50, 400), "2. Text Heading", fontsize=18, fontname="hebo")
+    for i in range(6):
+        page.insert_text((50, 430 + 14 * i), BODY, fontsize=10)
+    # Inline image (not listed in the page resources) between the two headings
+    xref = page.get_contents()[0]
+    doc.update_stream(xref, doc.xref_stream(xref) +
+                      b"\nq 200 0 0 100 50 542 cm BI /W 2 /H 2 /CS /G /BPC 8 ID \x00\xff\xff\x00 EI Q\n")
+    assert page.get_images() == []
+    pdf_path = tmp_path / "inline.pdf"
+    doc.save(pdf_path)
+    
+    assert _outline_texts(pdf_path) == ["1. Figure Heading", "2. Text Heading"]
+
+
+def test_heading_directly_followed_by_heading_is_dropped(tmp_path):
+    doc = _make_doc([[("1. First", 18), ("2. Second", 18)] + [(BODY, 10)] * 8])
+    pdf_path = tmp_path / "adjacent.pdf"
+    doc.save(pdf_path)
+    
+    assert _outline_texts(pdf_path) == ["2. Second"]
+
+
+def test_children_must_be_deeper_and_on_same_or_next_page():
+    extractor = EnhancedPDFOutlineExtractor()
+    
+    assert extractor._find_headings_with_children(_levels((0, 1), (0, 2))) == [True, False]
+    assert extractor._find_headings_with_children(_levels((0, 1), (1, 2))) == [True, False]
+    assert extractor._find_headings_with_children(_levels((0, 1), (2, 2))) == [False, False]
+    assert extractor._find_headings_with_children(_levels((0, 2), (0, 2), (1, 1))) == [False, False, False]
+
+
+def test_last_heading_content_search_stops_at_next_page():
+    texts, has_content = _content_sweep([[("1. Last Heading", 18)], [], [(BODY, 10)]])
+    assert texts == ["1. Last Heading"]
+    assert has_content == [False]
+    
+    texts, has_content = _content_sweep([[("1. Last Heading", 18)], [(BODY, 10)], []])
+    assert has_content == [True]
+
+
+def test_content_belongs_to_the_nearest_preceding_heading():
+    # Body after the later heading is not credited to the earlier one
+    texts, has_content = _content_sweep([[("1. Alpha", 18)], [("2. Beta", 18), (BODY, 10)]])
+    assert texts == ["1. Alpha", "2. Beta"]
+    assert has_content == [False, True]
+    
+    # Body above the later heading on its own page belongs to the earlier one
+    texts, has_content = _content_sweep([[("1. Alpha", 18)], [(BODY, 10), ("2. Beta", 18)]])
+    assert has_content == [True, False]
+
+
+def test_process_all_pdfs_writes_one_json_per_input(tmp_path):
+    input_dir = tmp_path / "input"
+    output_dir = tmp_path / "output"
+    input_dir.mkdir()
+    for name in ("first", "second", "third"):
+        _make_doc([[("Annual Report", 24), ("1. Introduction", 18)] + [(BODY, 10)] * 8]).save(input_dir / f"{name}.pdf")
+    
+    process_all_pdfs(str(input_dir), str(output_dir))
+    
+    assert sorted(p.name for p in output_dir.iterdir()) == ["first.json", "second.json", "third.json"]
+    for output_file in output_dir.iterdir():
+        result = json.loads(output_file.read_text(encoding="utf-8"))
+        assert result["outline"] == [{"level": "H1", "text": "1. Introduction", "page": 1}]
+
+
+def test_process_one_outside_pool_builds_its_own_extractor(tmp_path):
+    _make_doc([[("Annual Report", 24), ("1. Introduction", 18)] + [(BODY, 10)] * 8]).save(tmp_path / "solo.pdf")
+    
+    _process_one(str(tmp_path / "solo.pdf"), str(tmp_path))
+    
+    result = json.loads((tmp_path / "solo.json").read_text(encoding="utf-8"))
+    assert result["outline"] == [{"level": "H1", "text": "1. Introduction", "page": 1}]